@@ -4,67 +4,202 @@ Convert favorite files from VS Code settings to text format.
 Reads .vscode/settings.json and converts .ipynb files to .txt files.
 """
 
+import argparse
+import errno
 import json
+import mmap
 import os
+import shutil
+import stat
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import nbformat
-from nbformat import v4
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+# Files smaller than this are copied with a single read and write, larger
+# ones are memory-mapped, where the mapping cost is no longer dominant
+SMALL_FILE_SIZE = 128 * 1024
+COPY_BUFFER_SIZE = 1 << 20
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Text layout of the converted files
+SEP60 = "=" * 60 + "\n\n"
+SEP30 = "-" * 30 + "\n"
+CODE_OPEN = "```python\n"
+CODE_CLOSE = "\n```\n\n"
+MD_HDR = "## Cell {} (Markdown)\n" + SEP30
+CODE_HDR = "## Cell {} (Code)\n" + SEP30
+
+IPYNB = ".ipynb"
+SUPPORTED = frozenset({".py", ".txt", ".md", ".rst", IPYNB})
+NO_CELLS_ERROR = "no top-level 'cells' list, only nbformat 4 notebooks are supported"
+
+# Parsed settings.json keyed by (path, st_mtime_ns, st_size)
+_SETTINGS_CACHE = {}
+
+def _join(text):
+    """Join a notebook multiline string, which may be stored as a list of lines."""
+    if isinstance(text, list):
+        return ''.join(text)
+    return text
+
+def _iter_cells_ijson(f):
+    """Yield notebook cells parsed with ijson, dropping the output payloads we never write.
+
+    Only 'text/plain' is kept from the 'data' mapping of the outputs, so
+    base64 images and other rich outputs are never assembled into a cell.
+    """
+    cell_prefix = 'cells.item'
+    data_prefix = 'cells.item.outputs.item.data'
+    builder = None
+    skipping = False
+    has_cells = False
+    for prefix, event, value in ijson.parse(f):
+        if builder is None:
+            if prefix == 'cells' and event == 'start_array':
+                has_cells = True
+            if prefix == cell_prefix and event == 'start_map':
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            continue
+        if skipping:
+            # Everything up to the next key or the end of 'data' belongs to the skipped value
+            if prefix != data_prefix:
+                continue
+            skipping = False
+        if prefix == data_prefix and event == 'map_key' and value != 'text/plain':
+            skipping = True
+            continue
+        builder.event(event, value)
+        if prefix == cell_prefix and event == 'end_map':
+            yield builder.value
+            builder = None
+    if not has_cells:
+        raise ValueError(NO_CELLS_ERROR)
+
+def iter_notebook_cells(f):
+    """Yield the cells of a notebook file opened in binary mode.
+
+    With ijson the cells are parsed one at a time. Otherwise the whole
+    notebook is parsed with json.loads; the nbformat 4 structure is used
+    as it is, without nbformat's validation and NotebookNode wrapping.
+    """
+    if ijson is not None:
+        yield from _iter_cells_ijson(f)
+    else:
+        nb = json.loads(f.read())
+        if not isinstance(nb, dict) or not isinstance(nb.get('cells'), list):
+            raise ValueError(NO_CELLS_ERROR)
+        yield from nb['cells']
+
+def _notebook_chunks(src, notebook_path):
+    """Yield the converted text of a notebook as encoded chunks, one per cell."""
+    yield (f"# Converted from: {notebook_path}\n" + SEP60).encode('utf-8')
+    
+    # Assemble each cell into a single chunk
+    for i, cell in enumerate(iter_notebook_cells(src), 1):
+        parts = []
+        if cell['cell_type'] == 'markdown':
+            parts.append(MD_HDR.format(i))
+            parts.append(_join(cell['source']))
+            parts.append("\n\n")
+            
+        elif cell['cell_type'] == 'code':
+            parts.append(CODE_HDR.format(i))
+            parts.append(CODE_OPEN)
+            parts.append(_join(cell['source']))
+            parts.append(CODE_CLOSE)
+            
+            # Include outputs if they exist
+            if cell.get('outputs'):
+                parts.append("### Output:\n")
+                for output in cell['outputs']:
+                    output_type = output['output_type']
+                    if output_type not in ('stream', 'execute_result', 'error'):
+                        continue
+                    if output_type == 'stream':
+                        parts.append(f"```\n{_join(output['text'])}```\n")
+                    elif output_type == 'execute_result':
+                        data = output.get('data') or {}
+                        txt = data.get('text/plain')
+                        if txt is None:
+                            continue
+                        parts.append(f"```\n{_join(txt)}```\n")
+                    else:
+                        parts.append(f"```\nError: {output['ename']}: {output['evalue']}\n```\n")
+                parts.append("\n")
+        
+        if parts:
+            yield "".join(parts).encode('utf-8')
 
 def convert_notebook_to_text(notebook_path, output_path):
     """Convert a Jupyter notebook to plain text format."""
+    # The cells are parsed while writing, so write to a temporary file and
+    # only move it into place once the whole notebook was converted
+    tmp_path = f"{output_path}.part"
     try:
-        with open(notebook_path, 'r', encoding='utf-8') as f:
-            nb = nbformat.read(f, as_version=4)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f"# Converted from: {notebook_path}\n")
-            f.write("=" * 60 + "\n\n")
-            
-            for i, cell in enumerate(nb.cells, 1):
-                if cell.cell_type == 'markdown':
-                    f.write(f"## Cell {i} (Markdown)\n")
-                    f.write("-" * 30 + "\n")
-                    f.write(cell.source)
-                    f.write("\n\n")
-                    
-                elif cell.cell_type == 'code':
-                    f.write(f"## Cell {i} (Code)\n")
-                    f.write("-" * 30 + "\n")
-                    f.write("```python\n")
-                    f.write(cell.source)
-                    f.write("\n```\n\n")
-                    
-                    # Include outputs if they exist
-                    if hasattr(cell, 'outputs') and cell.outputs:
-                        f.write("### Output:\n")
-                        for output in cell.outputs:
-                            if output.output_type == 'stream':
-                                f.write(f"```\n{output.text}```\n")
-                            elif output.output_type == 'execute_result':
-                                if 'text/plain' in output.data:
-                                    f.write(f"```\n{output.data['text/plain']}```\n")
-                            elif output.output_type == 'error':
-                                f.write(f"```\nError: {output.ename}: {output.evalue}\n```\n")
-                        f.write("\n")
+        with open(notebook_path, 'rb') as src, open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            for chunk in _notebook_chunks(src, notebook_path):
+                f.write(chunk)
+        os.replace(tmp_path, output_path)
                         
         print(f"✓ Converted: {notebook_path} -> {output_path}")
         return True
         
     except Exception as e:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
         print(f"✗ Error converting {notebook_path}: {e}")
         return False
 
+def render_notebook(notebook_path, output_path):
+    """Return the converted text of a notebook as bytes, or None on error.
+
+    Used with --iouring, where the parent process writes the output file and
+    reports the success once it was written.
+    """
+    try:
+        with open(notebook_path, 'rb') as src:
+            return b"".join(_notebook_chunks(src, notebook_path))
+        
+    except Exception as e:
+        print(f"✗ Error converting {notebook_path}: {e}")
+        return None
+
+def _copy_header(source_path):
+    return (f"# Copied from: {source_path}\n" + SEP60).encode('utf-8')
+
 def copy_text_file(source_path, output_path):
     """Copy a text file to the output directory."""
     try:
-        with open(source_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f"# Copied from: {source_path}\n")
-            f.write("=" * 60 + "\n\n")
-            f.write(content)
+        header = _copy_header(source_path)
+        # Copy the bytes as they are, there is no need to decode them
+        with open(source_path, 'rb') as src:
+            # The size comes from the open descriptor, no extra stat of the path
+            if os.fstat(src.fileno()).st_size < SMALL_FILE_SIZE:
+                Path(output_path).write_bytes(header + src.read())
+            else:
+                with open(output_path, 'wb') as dst:
+                    dst.write(header)
+                    try:
+                        data = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (OSError, ValueError):
+                        # The file cannot be mapped, stream it instead
+                        shutil.copyfileobj(src, dst, length=COPY_BUFFER_SIZE)
+                    else:
+                        with data:
+                            dst.write(data)
             
         print(f"✓ Copied: {source_path} -> {output_path}")
         return True
@@ -73,7 +208,224 @@ def copy_text_file(source_path, output_path):
         print(f"✗ Error copying {source_path}: {e}")
         return False
 
+def render_text_file(source_path, output_path):
+    """Return the copied text of a file as bytes, or None on error.
+
+    Used with --iouring, where the parent process writes the output file and
+    reports the success once it was written.
+    """
+    try:
+        return _copy_header(source_path) + Path(source_path).read_bytes()
+        
+    except Exception as e:
+        print(f"✗ Error copying {source_path}: {e}")
+        return None
+
+# Converter used by the standard writer -> (renderer used with --iouring,
+# verb reported once the rendered file was written)
+RENDERERS = {
+    convert_notebook_to_text: (render_notebook, "Converted"),
+    copy_text_file: (render_text_file, "Copied"),
+}
+
+class IOUringWriter:
+    """Write many small files through batched io_uring submissions.
+
+    Every file becomes a linked openat -> write -> close chain on a direct
+    (registered) descriptor, and BATCH files are submitted with a single
+    io_uring_submit. A wave is reaped just before the next one is prepared,
+    so the kernel writes one wave while the next is being converted.
+    A file whose chain failed is removed again, so that no truncated or
+    partial output is left behind. Requires the liburing package and Linux 5.15+.
+    """
+    BATCH = 128
+
+    def __init__(self):
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        liburing.io_uring_queue_init(4 * self.BATCH, self.ring)
+        try:
+            liburing.io_uring_register_files_sparse(self.ring, self.BATCH)
+        except Exception:
+            liburing.io_uring_queue_exit(self.ring)
+            raise
+        self.how = liburing.OpenHow(liburing.O_CREAT | liburing.O_WRONLY | liburing.O_TRUNC, 0o666)
+        self.queued = []
+        # Submitted (path, data, message) items, data must stay alive until reaped
+        self.in_flight = []
+        self.written = 0
+        self.failed = 0
+
+    def write(self, path, data, message):
+        """Queue data to be written to path, message is printed once it was written."""
+        self.queued.append((str(path), data, message))
+        if len(self.queued) == self.BATCH:
+            self._submit()
+
+    def _submit(self):
+        self._reap()
+        for slot, (path, data, _) in enumerate(self.queued):
+            # user_data encodes the slot and the step of the chain
+            sqe = liburing.io_uring_get_sqe(self.ring)
+            liburing.io_uring_prep_openat2_direct(sqe, path, self.how, slot)
+            liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+            liburing.io_uring_sqe_set_data64(sqe, 3 * slot)
+            sqe = liburing.io_uring_get_sqe(self.ring)
+            liburing.io_uring_prep_write(sqe, slot, data, 0)
+            # Hard link, so the descriptor is closed even if the write fails
+            liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_FIXED_FILE | liburing.IOSQE_IO_HARDLINK)
+            liburing.io_uring_sqe_set_data64(sqe, 3 * slot + 1)
+            sqe = liburing.io_uring_get_sqe(self.ring)
+            liburing.io_uring_prep_close_direct(sqe, slot)
+            liburing.io_uring_sqe_set_data64(sqe, 3 * slot + 2)
+        liburing.io_uring_submit(self.ring)
+        self.in_flight, self.queued = self.queued, []
+
+    def _reap(self):
+        if not self.in_flight:
+            return
+        # Take the wave off in_flight first, so a failure here cannot make
+        # close() wait again for completions that were already consumed
+        in_flight, self.in_flight = self.in_flight, []
+        results = [[None] * 3 for _ in in_flight]
+        # Reap one completion at a time, io_uring_cqe_seen handles the CQ ring wrapping
+        for _ in range(3 * len(in_flight)):
+            liburing.io_uring_wait_cqe(self.ring, self.cqe)
+            cqe = self.cqe[0]
+            slot, step = divmod(cqe.user_data, 3)
+            try:
+                res = cqe.res
+            except OSError as e:
+                # liburing raises for a negative result instead of returning -errno
+                res = -e.errno
+            liburing.io_uring_cqe_seen(self.ring, cqe)
+            results[slot][step] = res
+        for (path, data, message), (opened, wrote, closed) in zip(in_flight, results):
+            if opened >= 0 and wrote == len(data) and closed >= 0:
+                print(message)
+                self.written += 1
+                continue
+            if opened >= 0:
+                # O_TRUNC already emptied the file, don't leave a partial output
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            errors = [res for res in (opened, wrote, closed) if res < 0]
+            reason = os.strerror(-errors[0]) if errors else "short write"
+            print(f"✗ Error writing {path}: {reason}")
+            self.failed += 1
+
+    def close(self):
+        """Submit the remaining files, wait for all of them and release the ring."""
+        try:
+            if self.queued:
+                self._submit()
+            self._reap()
+        finally:
+            liburing.io_uring_queue_exit(self.ring)
+
+def _derive_output(rel, is_ipynb):
+    """Return the flat .txt output name for a relative input path."""
+    name = rel.replace("/", "_").replace("\\", "_")
+    if is_ipynb:
+        return name[:-6] + ".txt"
+    return name if name.endswith(".txt") else os.path.splitext(name)[0] + ".txt"
+
+def load_settings(settings_file):
+    """Return the parsed settings.json, reparsing it only when it changed."""
+    st = settings_file.stat()
+    key = (str(settings_file), st.st_mtime_ns, st.st_size)
+    settings = _SETTINGS_CACHE.get(key)
+    if settings is None:
+        # json.loads on bytes skips the incremental text decoder of json.load
+        with open(settings_file, 'rb') as f:
+            settings = json.loads(f.read())
+        # Only the current version of the file is worth keeping
+        _SETTINGS_CACHE.clear()
+        _SETTINGS_CACHE[key] = settings
+    return settings
+
+def iter_files(root, exts=None):
+    """Yield an os.DirEntry for every file below root whose suffix is in exts.
+
+    If exts is None all files are yielded.
+
+    The tree is walked once with os.scandir, and Path objects are only
+    created by the callers for the files they use. The file type comes from
+    the directory listing and entry.stat() is cached, so no file is stat'ed
+    more than once.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            # An unreadable directory is skipped, as pathlib's rglob does
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                    continue
+                try:
+                    is_file = e.is_file()
+                except OSError:
+                    # e.g. a symlink loop, which is not a file we can use
+                    continue
+                if is_file:
+                    if exts is None:
+                        yield e
+                        continue
+                    name = e.name
+                    i = name.rfind('.')
+                    if i >= 0 and name[i:] in exts:
+                        yield e
+
+def build_basename_index(root):
+    """Map every file name below root to the paths of the files with that name."""
+    index = {}
+    for entry in iter_files(root):
+        index.setdefault(entry.name, []).append(Path(entry.path))
+    return index
+
+def dedupe_work_items(work_items):
+    """Keep one work item per output path and return (work_items, replaced).
+
+    Several files can map to the same output name, and they must not be
+    written concurrently. As in the sequential order, the last one wins.
+    The same file listed twice, e.g. on its own and inside a directory
+    favorite, is dropped silently; replaced counts the other collisions.
+    """
+    unique_items = {}
+    replaced = 0
+    for item in work_items:
+        output_path = item[2]
+        previous = unique_items.get(output_path)
+        if previous is not None and previous[1] != item[1]:
+            print(f"⚠ {item[1]} replaces {previous[1]} as {output_path}")
+            replaced += 1
+        unique_items[output_path] = item
+    return list(unique_items.values()), replaced
+
+def _make_iouring_writer():
+    """Return an IOUringWriter, or None if io_uring cannot be used here."""
+    if liburing is None:
+        print("⚠ liburing is not installed, using the standard writer")
+        return None
+    try:
+        return IOUringWriter()
+    except Exception as e:
+        print(f"⚠ io_uring is not available ({e}), using the standard writer")
+        return None
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iouring", action="store_true",
+                        help="write the output files with batched io_uring submissions (Linux, needs liburing)")
+    args = parser.parse_args()
+    
     # Get the script directory (where .vscode/settings.json should be)
     script_dir = Path(__file__).parent.parent.parent
     settings_file = script_dir / ".vscode" / "settings.json"
@@ -89,8 +441,7 @@ def main():
     
     # Read settings.json
     try:
-        with open(settings_file, 'r', encoding='utf-8') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file)
     except Exception as e:
         print(f"Error reading settings.json: {e}")
         sys.exit(1)
@@ -105,6 +456,10 @@ def main():
     
     converted_count = 0
     skipped_count = 0
+    # (converter, input_path, output_path) for every file to process
+    work_items = []
+    # Repository files by name, built on the first favorite that is not found
+    basename_index = None
     
     for favorite in favorites:
         file_path = favorite.get("filePath", "")
@@ -114,9 +469,17 @@ def main():
             
         # Convert relative path to absolute
         full_path = script_dir / file_path
+        # A single stat() tells whether the favorite exists and what it is
+        try:
+            st = os.stat(full_path)
+        except OSError as e:
+            # Not there, a path through a file or a symlink loop: all count as not found
+            if e.errno not in (errno.ENOENT, errno.ENOTDIR, errno.ELOOP):
+                raise
+            st = None
         
         # Handle directories - convert all files in the directory
-        if full_path.is_dir():
+        if st is not None and stat.S_ISDIR(st.st_mode):
             print(f"📁 Processing directory: {full_path}")
             # Create subdirectory in output
             dir_name = str(Path(file_path))
@@ -124,35 +487,20 @@ def main():
             sub_output_dir.mkdir(parents=True, exist_ok=True)
             
             # Find all supported files in the directory
-            supported_extensions = ['.ipynb', '.py', '.txt', '.md', '.rst']
-            for ext in supported_extensions:
-                for file in full_path.rglob(f'*{ext}'):
-                    if file.is_file():
-                        relative_to_dir = file.relative_to(full_path)
-                        output_name = str(relative_to_dir)
-                        
-                        if file.suffix == '.ipynb':
-                            output_name = output_name.replace('.ipynb', '.txt')
-                            output_path = sub_output_dir / output_name
-                            if convert_notebook_to_text(file, output_path):
-                                converted_count += 1
-                            else:
-                                skipped_count += 1
-                        else:
-                            if not output_name.endswith('.txt'):
-                                output_name = Path(output_name).stem + '.txt'
-                            output_path = sub_output_dir / output_name
-                            if copy_text_file(file, output_path):
-                                converted_count += 1
-                            else:
-                                skipped_count += 1
+            for entry in iter_files(full_path, SUPPORTED):
+                is_ipynb = entry.name.endswith(IPYNB)
+                output_path = sub_output_dir / _derive_output(os.path.relpath(entry.path, full_path), is_ipynb)
+                converter = convert_notebook_to_text if is_ipynb else copy_text_file
+                work_items.append((converter, Path(entry.path), output_path))
             continue
         
-        if not full_path.exists():
+        if st is None:
             # Try to find the file by searching for it
             print(f"⚠ File not found at expected location: {full_path}")
             # Try to find it in the repository
-            possible_files = list(script_dir.rglob(Path(file_path).name))
+            if basename_index is None:
+                basename_index = build_basename_index(script_dir)
+            possible_files = basename_index.get(Path(file_path).name, [])
             if possible_files:
                 print(f"  Found possible matches:")
                 for pf in possible_files[:3]:  # Show first 3 matches
@@ -163,41 +511,55 @@ def main():
             else:
                 skipped_count += 1
                 continue
-            
-        # Skip if still not found
-        if not full_path.exists():
-            print(f"⚠ File not found: {full_path}")
-            skipped_count += 1
-            continue
         
         # Generate output filename
-        relative_path = Path(file_path)
-        # output_name = str(relative_path)
-        output_name = file_name
-        
-        if full_path.suffix == '.ipynb':
-            output_name = output_name.replace('.ipynb', '.txt')
-            output_path = output_dir / output_name
-            
-            if convert_notebook_to_text(full_path, output_path):
-                converted_count += 1
-            else:
-                skipped_count += 1
-                
-        elif full_path.suffix in ['.py', '.txt', '.md', '.rst']:
-            if not output_name.endswith('.txt'):
-                output_name = Path(output_name).stem + '.txt'
-            output_path = output_dir / output_name
-            
-            if copy_text_file(full_path, output_path):
-                converted_count += 1
-            else:
-                skipped_count += 1
+        suffix = full_path.suffix
+        if suffix in SUPPORTED:
+            is_ipynb = suffix == IPYNB
+            output_path = output_dir / _derive_output(file_name, is_ipynb)
+            converter = convert_notebook_to_text if is_ipynb else copy_text_file
+            work_items.append((converter, full_path, output_path))
                 
         else:
             print(f"⚠ Skipping unsupported file type: {full_path}")
             skipped_count += 1
     
+    work_items, replaced = dedupe_work_items(work_items)
+    skipped_count += replaced
+    
+    writer = _make_iouring_writer() if args.iouring and work_items else None
+    
+    # The files are independent, convert them in parallel
+    if writer is not None:
+        # Workers only render the files, the parent writes them in batches
+        try:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = {}
+                for converter, input_path, output_path in work_items:
+                    renderer, verb = RENDERERS[converter]
+                    future = executor.submit(renderer, input_path, output_path)
+                    futures[future] = (output_path, f"✓ {verb}: {input_path} -> {output_path}")
+                for future in as_completed(futures):
+                    data = future.result()
+                    if data is None:
+                        skipped_count += 1
+                        continue
+                    output_path, message = futures[future]
+                    writer.write(output_path, data, message)
+        finally:
+            writer.close()
+        converted_count += writer.written
+        skipped_count += writer.failed
+    elif work_items:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [executor.submit(converter, input_path, output_path)
+                       for converter, input_path, output_path in work_items]
+            for future in as_completed(futures):
+                if future.result():
+                    converted_count += 1
+                else:
+                    skipped_count += 1
+    
     print(f"\nSummary:")
     print(f"✓ Converted: {converted_count} files")
     print(f"⚠ Skipped: {skipped_count} files")
@@ -206,9 +568,9 @@ def main():
     # Show what was created
     if output_dir.exists():
         print(f"\nGenerated files:")
-        for txt_file in sorted(output_dir.rglob("*.txt")):
-            rel_path = txt_file.relative_to(output_dir)
-            file_size = txt_file.stat().st_size
+        for entry in sorted(iter_files(output_dir, {".txt"}), key=lambda e: e.path):
+            rel_path = os.path.relpath(entry.path, output_dir)
+            file_size = entry.stat().st_size
             print(f"  {rel_path} ({file_size} bytes)")
 
 if __name__ == "__main__":
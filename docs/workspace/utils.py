@@ -1,4 +1,12 @@
+import numpy as np
 import vtk
+from vtk.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray
+
+# gmsh 2D element type -> (VTK cell type, nodes per element)
+GMSH_TO_VTK_CELL = {
+    2: (vtk.VTK_TRIANGLE, 3),
+    3: (vtk.VTK_QUAD, 4),
+}
 
 def gmsh2VTU(gmshModel):
     nodeTags, coords, _ = gmshModel.mesh.getNodes()
@@ -8,67 +16,79 @@ def gmsh2VTU(gmshModel):
     elemNodeTags = all2DElements[2][0]
 
     print("Element types:", elemType)
-    # Create a mapping from nodeTags to their positions
-    nodeTagToIndex = {nodeTag: idx for idx, nodeTag in enumerate(nodeTags)}
+    if elemType not in GMSH_TO_VTK_CELL:
+        raise ValueError(f"Unsupported gmsh element type: {elemType}")
+    vtkCellType, k = GMSH_TO_VTK_CELL[elemType]
 
-    # Create an ordered elemNodeTags array
-    orderedElemNodeTags = [nodeTagToIndex[nodeTag] for nodeTag in elemNodeTags]
+    # Map nodeTags to their positions. gmsh usually numbers nodes densely, so an
+    # inverse-index array is used; the dict is only a fallback for sparse tags
+    nodeTags_np = np.asarray(nodeTags, dtype=np.int64)
+    elemNodeTags_np = np.asarray(elemNodeTags, dtype=np.int64)
+    if nodeTags_np.max() <= 4 * nodeTags_np.size:
+        inv = np.empty(nodeTags_np.max() + 1, dtype=np.int64)
+        inv[nodeTags_np] = np.arange(nodeTags_np.size)
+        orderedElemNodeTags = inv[elemNodeTags_np]
+    else:
+        nodeTagToIndex = {nodeTag: idx for idx, nodeTag in enumerate(nodeTags_np.tolist())}
+        orderedElemNodeTags = np.fromiter((nodeTagToIndex[t] for t in elemNodeTags_np.tolist()),
+                                          dtype=np.int64, count=elemNodeTags_np.size)
 
+    # Upload the node coordinates in one shot; numpy_to_vtk with deep=False
+    # shares the buffer, so the grid has to keep coords_np alive
+    coords_np = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    vtk_arr = numpy_to_vtk(coords_np, deep=False, array_type=vtk.VTK_DOUBLE)
+    vtk_arr.SetNumberOfComponents(3)
     vtk_points = vtk.vtkPoints()
-    for i in range(len(nodeTags)):
-        vtk_points.InsertNextPoint(coords[3 * i], coords[3 * i + 1], coords[3 * i + 2])
+    vtk_points.SetData(vtk_arr)
 
     unstructuredGrid = vtk.vtkUnstructuredGrid()
     unstructuredGrid.SetPoints(vtk_points)
-
-    # Initialize the region array
-    regionArray = vtk.vtkFloatArray()
-    regionArray.SetName("Region")
-    regionArray.SetNumberOfComponents(1)
-    regionArray.SetNumberOfTuples(len(elemTags))
+    unstructuredGrid._coords_ref = coords_np
 
     # Get physical groups and their elements
+    elemTags_np = np.asarray(elemTags, dtype=np.int64)
     physicalGroups = gmshModel.getPhysicalGroups(2)
-    physicalGroupMap = {}
+    tagLists = []
+    groupIds = []
     for dim, tag in physicalGroups:
         elementaryTags= gmshModel.getEntitiesForPhysicalGroup(dim, tag)
         for elemTag in elementaryTags:
             # Get the mesh elements of the elementary entity
             _, elementTags, _ = gmshModel.mesh.getElements(dim, elemTag)
-            for elemTag in elementTags[0]:
-                physicalGroupMap[elemTag] = tag
+            groupElems = np.asarray(elementTags[0], dtype=np.int64)
+            tagLists.append(groupElems)
+            groupIds.append(np.full(groupElems.size, tag, dtype=np.int32))
 
-    regionValues = []
-    for i in range(len(elemTags)):
-        if elemType == 3:
-            quad = vtk.vtkQuad()
-            nodes = orderedElemNodeTags[4 * i:4 * (i + 1)]
-            for j in range(4):  # Quadrangle has 4 vertices
-                node_id = int(nodes[j])
-                quad.GetPointIds().SetId(j, node_id)
-            unstructuredGrid.InsertNextCell(quad.GetCellType(), quad.GetPointIds())
-        elif elemType == 2:
-            tri = vtk.vtkTriangle()
-            nodes = orderedElemNodeTags[3 * i:3 * (i + 1)]
-            for j in range(3):
-                node_id = int(nodes[j])
-                tri.GetPointIds().SetId(j, node_id)
-            unstructuredGrid.InsertNextCell(tri.GetCellType(), tri.GetPointIds())
+    # All 2D elements share elemType, so the connectivity can be uploaded at once
+    nElems = len(elemTags)
+    offsets = np.arange(0, k * nElems + 1, k, dtype=np.int64)
+    connectivity = orderedElemNodeTags.reshape(nElems, k).ravel()
+    cells = vtk.vtkCellArray()
+    cells.SetData(numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_to_vtkIdTypeArray(connectivity, deep=True))
+    unstructuredGrid.SetCells(vtkCellType, cells)
 
-        # Assign region based on physical group
-        region = physicalGroupMap.get(elemTags[i], -1)  # Default to -1 if not found
-        regionValues.append(region)
+    # Assign region based on physical group, default to -1 if not found
+    if tagLists:
+        pg_elem = np.concatenate(tagLists)
+        pg_tag = np.concatenate(groupIds)
+        lookup = np.full(max(elemTags_np.max(), pg_elem.max(initial=0)) + 1, -1, dtype=np.int32)
+        lookup[pg_elem] = pg_tag
+        regions = lookup[elemTags_np]
+    else:
+        regions = np.full(elemTags_np.size, -1, dtype=np.int32)
 
     # Normalize the region values
-    min_region = min(regionValues)
-    max_region = max(regionValues)
-    if min_region == max_region:
-        normalizedRegions = [1.0] * len(regionValues)
+    rmin, rmax = regions.min(), regions.max()
+    if rmin == rmax:
+        normalized = np.ones_like(regions, dtype=np.float32)
     else:
-        normalizedRegions = [1 - (region - min_region) / (max_region - min_region) for region in regionValues]
+        normalized = (1.0 - (regions - rmin) / (rmax - rmin)).astype(np.float32, copy=False)
 
-    for i, normalizedRegion in enumerate(normalizedRegions):
-        regionArray.SetValue(i, normalizedRegion)
+    # normalized is a fresh array, so share it with VTK instead of copying it
+    regionArray = numpy_to_vtk(normalized, deep=False, array_type=vtk.VTK_FLOAT)
+    regionArray.SetName("Region")
+    unstructuredGrid._region_ref = normalized
 
     # Add the region array to the unstructured grid
     unstructuredGrid.GetCellData().AddArray(regionArray)
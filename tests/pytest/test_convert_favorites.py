@@ -0,0 +1,159 @@
+import importlib.util
+import json
+import pathlib
+import pytest
+
+_script = pathlib.Path(__file__).parents[2] / "docs" / "workspace" / "convertFavorites.py"
+_spec = importlib.util.spec_from_file_location("convertFavorites", _script)
+convertFavorites = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(convertFavorites)
+
+
+def make_writer():
+    pytest.importorskip("liburing")
+    try:
+        return convertFavorites.IOUringWriter()
+    except Exception as e:
+        pytest.skip(f"io_uring not available: {e}")
+
+
+def test_iouring_writer_many_waves(tmp_path, capsys):
+    # more than three waves, so the completion queue wraps around
+    n = 3 * convertFavorites.IOUringWriter.BATCH + 100
+    writer = make_writer()
+    for i in range(n):
+        writer.write(tmp_path / f"f{i}.txt", b"file %d\n" % i * 10, f"wrote {i}")
+    writer.write(tmp_path / "missing" / "x.txt", b"x", "wrote missing")
+    writer.close()
+    assert writer.written == n
+    assert writer.failed == 1
+    for i in range(n):
+        assert (tmp_path / f"f{i}.txt").read_bytes() == b"file %d\n" % i * 10
+    # success is only reported for files that were written
+    printed = capsys.readouterr().out
+    assert "wrote 0\n" in printed and "wrote missing" not in printed
+    # same permissions as the standard writer
+    (tmp_path / "plain.txt").write_bytes(b"x")
+    assert (tmp_path / "f0.txt").stat().st_mode == (tmp_path / "plain.txt").stat().st_mode
+
+
+def deny_scandir(monkeypatch, denied):
+    # chmod 000 does not stop root, so refuse the listing directly
+    scandir = convertFavorites.os.scandir
+
+    def guarded(path):
+        if pathlib.Path(path) == denied:
+            raise PermissionError(13, "Permission denied", str(path))
+        return scandir(path)
+
+    monkeypatch.setattr(convertFavorites.os, "scandir", guarded)
+
+
+def test_iter_files_skips_unreadable_directory(tmp_path, monkeypatch):
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "locked" / "hidden.md").write_text("x")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.py").write_text("x")
+    (tmp_path / "a.md").write_text("x")
+    deny_scandir(monkeypatch, tmp_path / "locked")
+    found = sorted(e.name for e in convertFavorites.iter_files(tmp_path, convertFavorites.SUPPORTED))
+    assert found == ["a.md", "b.py"]
+
+
+def test_basename_index_skips_unreadable_directory(tmp_path, monkeypatch):
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "moved.py").write_text("x")
+    (tmp_path / "src" / "deep").mkdir(parents=True)
+    (tmp_path / "src" / "deep" / "moved.py").write_text("x")
+    deny_scandir(monkeypatch, tmp_path / "build")
+    index = convertFavorites.build_basename_index(tmp_path)
+    assert index == {"moved.py": [tmp_path / "src" / "deep" / "moved.py"]}
+
+
+def test_dedupe_work_items(tmp_path):
+    convert = convertFavorites.convert_notebook_to_text
+    copy = convertFavorites.copy_text_file
+    out = tmp_path / "out"
+    items = [
+        (convert, tmp_path / "nbs" / "a.ipynb", out / "a.txt"),
+        (copy, tmp_path / "x" / "README.md", out / "README.txt"),
+        # the same notebook again, through its directory favorite
+        (convert, tmp_path / "nbs" / "a.ipynb", out / "a.txt"),
+        # a different file with the same output name
+        (copy, tmp_path / "y" / "README.md", out / "README.txt"),
+    ]
+    unique, replaced = convertFavorites.dedupe_work_items(items)
+    assert replaced == 1
+    assert unique == [items[2], items[3]]
+
+
+@pytest.fixture(params=["ijson", "json"])
+def parser(request, monkeypatch):
+    """Run the conversion through the ijson streaming path or the json.loads fallback."""
+    if request.param == "ijson":
+        if convertFavorites.ijson is None:
+            pytest.skip("ijson is not installed")
+    else:
+        monkeypatch.setattr(convertFavorites, "ijson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("notebook", [
+    {"metadata": {}, "nbformat": 3, "worksheets": [{"cells": []}]},
+    {"cells": {"cell_type": "markdown", "source": "x"}, "nbformat": 4},
+    [{"cell_type": "markdown", "source": "x"}],
+])
+def test_notebook_without_cells_list_fails(tmp_path, parser, notebook):
+    nb_path = tmp_path / "nb.ipynb"
+    nb_path.write_text(json.dumps(notebook))
+    out = tmp_path / "nb.txt"
+    assert not convertFavorites.convert_notebook_to_text(nb_path, out)
+    assert list(tmp_path.iterdir()) == [nb_path]
+
+
+def test_ijson_output_filter_matches_json(tmp_path, monkeypatch):
+    if convertFavorites.ijson is None:
+        pytest.skip("ijson is not installed")
+    notebook = {
+        "cells": [
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Title\n", "text"]},
+            {"cell_type": "code", "execution_count": 1, "metadata": {}, "source": "x = 42\nx",
+             "outputs": [
+                 {"output_type": "stream", "name": "stdout", "text": ["a\n", "b\n"]},
+                 {"output_type": "execute_result", "execution_count": 1, "metadata": {},
+                  "data": {
+                      # list-valued and map-valued rich data around text/plain,
+                      # with text/plain keys nested inside the skipped values
+                      "image/png": ["aGVsbG8=", "d29ybGQ="],
+                      "application/vnd.custom.v1+json": {"text/plain": "nested",
+                                                         "items": [1, {"text/plain": "deeper"}]},
+                      "text/plain": ["4", "2"],
+                      "text/html": "<b>42</b>",
+                  }},
+                 {"output_type": "display_data", "metadata": {},
+                  "data": {"image/png": "aGVsbG8=", "text/plain": "<Figure>"}},
+                 {"output_type": "execute_result", "execution_count": 2, "metadata": {},
+                  "data": {"image/png": "aGVsbG8="}},
+                 {"output_type": "error", "ename": "ValueError", "evalue": "bad", "traceback": []},
+             ]},
+            {"cell_type": "raw", "metadata": {}, "source": "raw"},
+            {"cell_type": "code", "execution_count": None, "metadata": {}, "source": "", "outputs": []},
+        ],
+        "metadata": {"cells": "not the cells"},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    nb_path = tmp_path / "nb.ipynb"
+    nb_path.write_text(json.dumps(notebook))
+
+    assert convertFavorites.convert_notebook_to_text(nb_path, tmp_path / "streamed.txt")
+    monkeypatch.setattr(convertFavorites, "ijson", None)
+    assert convertFavorites.convert_notebook_to_text(nb_path, tmp_path / "loaded.txt")
+
+    streamed = (tmp_path / "streamed.txt").read_text()
+    assert streamed == (tmp_path / "loaded.txt").read_text()
+    assert "```\n42```\n" in streamed
+    assert "a\nb\n" in streamed
+    assert "Error: ValueError: bad" in streamed
+    for text in ("nested", "deeper", "<Figure>", "aGVsbG8=", "<b>42</b>"):
+        assert text not in streamed